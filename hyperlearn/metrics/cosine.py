@@ -72,7 +72,7 @@ def cosine_similarity_sparse(val, colPointer, rowIndices, n, p, triangular = Fal
 
 	So New complexity approx= 1/2(Old complexity)
 	"""
-	norm_rows = rowSum_sparse(val, colPointer, rowIndices, norm = True)
+	norm_rows = rowSum_sparse(val, colPointer, rowIndices, norm = True, n_jobs = n_jobs)
 
 	if copy:
 		XXT = _XXT_sparse(val, colPointer, rowIndices, n, p, n_jobs)
@@ -113,7 +113,7 @@ def euclidean_distances_sparse(val, colPointer, rowIndices, n, p, triangular = F
 	XXT = _XXT_sparse(val, colPointer, rowIndices, n, p, n_jobs)
 
 	XXT = mult_minus2(XXT)
-	S = rowSum_sparse(val, colPointer, rowIndices)
+	S = rowSum_sparse(val, colPointer, rowIndices, n_jobs = n_jobs)
 
 	XXT += S[:, newaxis]
 	XXT += S #[newaxis,:]
@@ -1,119 +1,250 @@
 
-from numpy import uint, newaxis, finfo, float32, float64, zeros
-from .numba import sign, arange
-from numba import njit, prange
+from numpy import uint, finfo, float32, float64, zeros, int64, bool_, einsum, \
+				issubdtype, floating, concatenate, empty, matmul
+from numba import njit, prange, get_thread_id, get_num_threads
+from math import copysign
+from functools import lru_cache
 from psutil import virtual_memory
 from .exceptions import FutureExceedsMemory
-from scipy.linalg.blas import dsyrk, ssyrk		# For XTX, XXT
+from scipy.linalg.blas import dsyrk, ssyrk, dgemm, sgemm		# For XTX, XXT, fastDot
 
 __all__ = ['svd_flip', 'eig_flip', '_svdCond', '_eighCond',
 			'memoryXTX', 'memoryGram', 'memorySVD', '_float',
-			'traceXTX', 'fastDot', '_XTX', '_XXT', '_XXT_sparse',
+			'traceXTX', 'fastDot', 'fastDotSpec', '_XTX', '_XXT', '_XXT_sparse',
 			'rowSum', 'rowSum_sparse', 'reflect']
 
 _condition = {'f': 1e3, 'd': 1e6}
 
+# SYRK only does half the FLOPS of GEMM, but OpenBLAS / Accelerate SYRK
+# kernels are slower than GEMM when the inner dimension is much larger
+# than the output (tall-thin case, eg PCA / LinReg designs). Past this
+# inner/output ratio, dispatch to GEMM instead.
+_SYRK_GEMM_RATIO = 20
+
+# Below this density X @ XT dispatches to the SMMP kernel, which only
+# visits row pairs sharing at least one column instead of all O(n^2).
+_SMMP_MAX_DENSITY = 0.01
+
+
+@njit(fastmath = True, nogil = True, parallel = True)
+def _svd_flip_U(U, VT):
+	"""
+	See svd_flip(U, VT, U_decision = True) documentation.
+	"""
+	n, p = U.shape
+	d = VT.shape[1]
+
+	for j in prange(p):
+		amax = 0.0
+		s = 1.0
+		for i in range(n):
+			Uij = U[i,j]
+			a = abs(Uij)
+			if a > amax:
+				amax = a
+				s = copysign(1.0, Uij)
+		for i in range(n):
+			U[i,j] *= s
+		for k in range(d):
+			VT[j,k] *= s
+
+
+@njit(fastmath = True, nogil = True, parallel = True)
+def _svd_flip_VT(U, VT):
+	"""
+	See svd_flip(U, VT, U_decision = False) documentation.
+	"""
+	p, d = VT.shape
+	n = U.shape[0]
+
+	for j in prange(p):
+		amax = 0.0
+		s = 1.0
+		for k in range(d):
+			Vjk = VT[j,k]
+			a = abs(Vjk)
+			if a > amax:
+				amax = a
+				s = copysign(1.0, Vjk)
+		for k in range(d):
+			VT[j,k] *= s
+		for i in range(n):
+			U[i,j] *= s
+
 
 def svd_flip(U, VT, U_decision = True):
 	"""
+	[Edited 30/8/2026 Fused into 1 NUMBA kernel]
 	Flips the signs of U and VT for SVD in order to force deterministic output.
 
 	Follows Sklearn convention by looking at U's maximum in columns
 	as default.
+
+	Instead of materializing abs(U), argmaxing, then rescaling (4 passes
+	over U and VT + temporaries), each column's argmax of |U|, its sign and
+	the scaling of U[:,j], VT[j] are fused into 1 streaming pass, parallel
+	over columns.
 	"""
 	if U_decision:
-		max_abs_cols = abs(U).argmax(0)
-		signs = sign( U[max_abs_cols, arange(U.shape[1])  ]  )
+		_svd_flip_U(U, VT)
 	else:
 		# rows of v, columns of u
-		max_abs_rows = abs(VT).argmax(1)
-		signs = sign( VT[  arange(VT.shape[0]) , max_abs_rows] )
-
-	U *= signs
-	VT *= signs[:,newaxis]
+		_svd_flip_VT(U, VT)
 	return U, VT
 
 
 
+@njit(fastmath = True, nogil = True, parallel = True)
+def _eig_flip(V):
+	"""
+	See eig_flip(V) documentation.
+	"""
+	n, p = V.shape
+
+	for j in prange(p):
+		amax = 0.0
+		s = 1.0
+		for i in range(n):
+			Vij = V[i,j]
+			a = abs(Vij)
+			if a > amax:
+				amax = a
+				s = copysign(1.0, Vij)
+		for i in range(n):
+			V[i,j] *= s
+
+
 def eig_flip(V):
 	"""
-	Flips the signs of V for Eigendecomposition in order to 
+	[Edited 30/8/2026 Fused into 1 NUMBA kernel]
+	Flips the signs of V for Eigendecomposition in order to
 	force deterministic output.
 
 	Follows Sklearn convention by looking at V's maximum in columns
 	as default. This essentially mirrors svd_flip(U_decision = False)
+
+	abs(V) used to be materialized just to argmax it; now each column's
+	argmax of |V|, the sign and the rescale of V[:,j] happen in 1
+	streaming pass, parallel over columns.
 	"""
-	max_abs_rows = abs(V).argmax(0)
-	signs = sign( V[max_abs_rows, arange(V.shape[1]) ] )
-	V *= signs
+	_eig_flip(V)
 	return V
 
 
 
+@njit(fastmath = True, nogil = True, cache = True)
+def _svdCond_kernel(S, thr, alpha):
+	"""
+	See _svdCond documentation.
+	"""
+	rank = 0
+	for i in range(S.size):
+		s = S[i]
+		if s > thr:
+			rank += 1
+		S[i] = s / (s*s + alpha)
+	return rank
+
+
 def _svdCond(U, S, VT, alpha):
 	"""
+	[Edited 30/8/2026 fused into 1 NUMBA pass]
 	Condition number from Scipy.
 	cond = 1e-3 / 1e-6  * eps * max(S)
+
+	The rank count and the S /= (S**2 + alpha) rewrite used to take
+	three passes over S with two temporaries; both now happen in one
+	in-place scan.
 	"""
 	t = S.dtype.char.lower()
-	cond = (S > (_condition[t] * finfo(t).eps * S[0]))
-	rank = cond.sum()
-	
-	S /= (S**2 + alpha)
+	rank = _svdCond_kernel(S, _condition[t] * finfo(t).eps * S[0], alpha)
 	return U[:, :rank], S[:rank], VT[:rank]
 
 
 
+@njit(fastmath = True, nogil = True, cache = True)
+def _eighCond_bounds(S2, thr):
+	"""
+	See _eighCond documentation.
+	Kept eigenvalues are [0:front) and [back:n).
+	"""
+	n = S2.size
+	front = 0
+	while front < n and abs(S2[front]) > thr:
+		front += 1
+	back = n
+	while back > front and abs(S2[back-1]) > thr:
+		back -= 1
+	return front, back
+
+
 def _eighCond(S2, V):
 	"""
+	[Edited 30/8/2026 no more abs(S2) copy nor boolean indexing]
 	Condition number from Scipy.
 	cond = 1e-3 / 1e-6  * eps * max(S2)
 
 	Note that maximum could be either S2[-1] or S2[0]
 	depending on it's absolute magnitude.
+
+	Since eigh outputs sorted eigenvalues, the discarded ones
+	(|s| <= cond) form one contiguous band, so the kept ones are
+	returned as views - no abs(S2) temporary, no V[:, cond] copy.
+	The rare both-ends case (large positive AND negative eigenvalues)
+	still concatenates.
 	"""
 	t = S2.dtype.char.lower()
-	absS = abs(S2)
-	maximum = absS[0] if absS[0] >= absS[-1] else absS[-1]
+	a_first, a_last = abs(S2[0]), abs(S2[-1])
+	maximum = a_first if a_first >= a_last else a_last
+	thr = _condition[t] * finfo(t).eps * maximum
 
-	cond = (absS > (_condition[t] * finfo(t).eps * maximum) )
-	S2 = S2[cond]
-	
-	return S2, V[:, cond]
+	front, back = _eighCond_bounds(S2, thr)
+	if back == S2.size:
+		return S2[:front], V[:, :front]
+	if front == 0:
+		return S2[back:], V[:, back:]
+	return concatenate((S2[:front], S2[back:])), \
+		concatenate((V[:, :front], V[:, back:]), axis = 1)
 
 
 
-def memoryXTX(X):
+def memoryXTX(X, free = None):
 	"""
 	Computes the memory usage for X.T @ X so that error messages
 	can be broadcast without submitting to a memory error.
+
+	Pass FREE (bytes) to skip the virtual_memory() syscall when
+	checking repeatedly in a tight loop.
 	"""
-	free = virtual_memory().free * 0.95
-	byte = 4 if '32' in str(X.dtype) else 8
-	memUsage = X.shape[1]**2 * byte
+	if free is None:
+		free = virtual_memory().free * 0.95
+	memUsage = X.shape[1]**2 * X.dtype.itemsize
 
 	return memUsage < free
 
 
 
-def memoryGram(X):
+def memoryGram(X, free = None):
 	"""
 	Computes the memory usage for X.T @ X or X @ X.T so that error messages
 	can be broadcast without submitting to a memory error.
+
+	Pass FREE (bytes) to skip the virtual_memory() syscall when
+	checking repeatedly in a tight loop.
 	"""
 	n,p = X.shape
-	free = virtual_memory().free * 0.95
-	byte = 4 if '32' in str(X.dtype) else 8
+	if free is None:
+		free = virtual_memory().free * 0.95
 	size = p if n > p else n
-	
-	memUsage = size**2 * byte
+
+	memUsage = size**2 * X.dtype.itemsize
 
 	if memUsage > free:
 		raise FutureExceedsMemory()
 	return
 
 
-def memorySVD(X):
+def memorySVD(X, free = None):
 	"""
 	Computes the approximate memory usage of SVD(X) [transpose or not].
 	How it's computed:
@@ -121,34 +252,34 @@ def memorySVD(X):
 		U(n,p) * S(p) * VT(p,p)
 		This means RAM usgae is np+p+p^2 approximately.
 	### TODO: Divide N Conquer SVD vs old SVD
+
+	Pass FREE (bytes) to skip the virtual_memory() syscall when
+	checking repeatedly in a tight loop.
 	"""
 	n,p = X.shape
 	if n > p: n,p = p,n
-	free = virtual_memory().free * 0.95
-	byte = 4 if '32' in str(X.dtype) else 8
+	if free is None:
+		free = virtual_memory().free * 0.95
 
 	U = n*p
 	S = p
 	VT = p*p
-	memUsage = (U+S+VT) * byte
+	memUsage = (U+S+VT) * X.dtype.itemsize
 
 	return memUsage < free
 
 
 
 def _float(data):
-	dtype = str(data.dtype)
-	if 'f' not in dtype:
-		if '64' in dtype:
-			return data.astype(float64)
-		return data.astype(float32)
-	return data
+	dtype = data.dtype
+	if issubdtype(dtype, floating):
+		return data
+	return data.astype(float64 if dtype.itemsize >= 8 else float32, copy = False)
 
 
-@njit(fastmath = True, nogil = True, cache = True)
-def traceXTX(X):
+def traceXTX(X, precision = None):
 	"""
-	[Edited 18/10/2018]
+	[Edited 18/10/2018] [Edited 30/8/2026]
 	One drawback of truncated algorithms is that they can't output the correct
 	variance explained ratios, since the full eigenvalue decomp needs to be
 	done. However, using linear algebra, trace(XT*X) = sum(eigenvalues).
@@ -156,183 +287,428 @@ def traceXTX(X):
 	So, this function outputs the trace(XT*X) efficiently without computing
 	explicitly XT*X.
 
-	Changes --> now uses Numba which is approx 20% faster.
+	Changes --> flattens X and calls BLAS ddot/sdot, which runs the
+	reduction at full SIMD width. The old scalar Numba double loop
+	didn't always vectorize.
+
+	The reduction is bandwidth bound, so PRECISION = float32 halves the
+	bytes moved and doubles the SIMD lanes for float64 inputs - fine for
+	variance-ratio use. float32 inputs already stay float32 (copy = False
+	makes the cast a no-op).
+	"""
+	if precision is not None:
+		X = X.astype(precision, copy = False)
+	flat = X.ravel()
+	return flat @ flat
+
+
+
+def _dot(A, B):
+	"""
+	[Added 30/8/2026]
+	2D matrix multiply pinned to the BLAS3 path.
+
+	If one operand is exactly the other's transpose view, SYRK computes
+	the product at half the FLOPs and reflect fills the other triangle.
+	Otherwise transpose views are handed to GEMM through trans flags
+	rather than letting numpy decide, which can drop to a slow copy
+	path for non-contiguous views.
 	"""
-	n, p = X.shape
-	s = 0
-	for i in range(n):
-		for j in range(p):
-			xij = X[i,j]
-			s += xij*xij
-	return s
+	if A.ndim != 2 or B.ndim != 2 or A.dtype != B.dtype or \
+		A.dtype not in (float32, float64):
+		return A @ B
 
+	if B.base is A and B.shape == A.shape[::-1] and B.strides == A.strides[::-1]:
+		return reflect(_XXT(B))			# A @ A.T
+	if A.base is B and A.shape == B.shape[::-1] and A.strides == B.strides[::-1]:
+		return reflect(_XTX(A))			# B.T @ B
 
+	if A.flags.f_contiguous:
+		a, trans_a = A, 0
+	elif A.flags.c_contiguous:
+		a, trans_a = A.T, 1
+	else:
+		return A @ B
+	if B.flags.f_contiguous:
+		b, trans_b = B, 0
+	elif B.flags.c_contiguous:
+		b, trans_b = B.T, 1
+	else:
+		return A @ B
+	gemm = dgemm if A.dtype == float64 else sgemm
+	return gemm(1, a, b, trans_a = trans_a, trans_b = trans_b)
+
+
+_fastDot_decision = {}
 
 def fastDot(A, B, C):
 	"""
 	[Added 23/9/2018]
 	[Updated 1/10/2018 Error in calculating which is faster]
+	[Edited 30/8/2026 memoize the ordering decision per shape]
 	Computes a fast matrix multiplication of 3 matrices.
 	Either performs (A @ B) @ C or A @ (B @ C) depending which is more
 	efficient.
-	"""
-	size = A.shape
-	n = size[0]
-	p = size[1] if len(size) > 1 else 1
-	
-	size = B.shape
-	k = size[1] if len(size) > 1 else 1
-	
-	size = C.shape
-	d = size[1] if len(size) > 1 else 1
-	
-	# Forward (A @ B) @ C
-	# p*k*n + k*d*n = kn(p+d)
-	forward = k*n*(p+d)
-	
-	# Backward A @ (B @ C)
-	# p*d*n + k*d*p = pd(n+k)
-	backward = p*d*(n+k)
-	
-	if forward <= backward:
-		return (A @ B) @ C
-	return A @ (B @ C)
+
+	The ordering decision only depends on the 4 dimensions, so it is
+	cached - repeated calls on the same shapes (CV folds, repeated
+	predicts) skip the FLOP comparison entirely.
+	"""
+	n = A.shape[0]
+	p = A.shape[1] if A.ndim == 2 else 1
+	k = B.shape[1] if B.ndim == 2 else 1
+	d = C.shape[1] if C.ndim == 2 else 1
+
+	key = (n, p, k, d)
+	forward = _fastDot_decision.get(key)
+	if forward is None:
+		# Forward (A @ B) @ C
+		# p*k*n + k*d*n = kn(p+d)
+		# Backward A @ (B @ C)
+		# p*d*n + k*d*p = pd(n+k)
+		forward = k*n*(p+d) <= p*d*(n+k)
+		_fastDot_decision[key] = forward
+
+	if forward:
+		return _dot(_dot(A, B), C)
+	return _dot(A, _dot(B, C))
+
+
+@lru_cache(maxsize = 128)
+def fastDotSpec(n, p, k, d, dtype):
+	"""
+	[Added 30/8/2026]
+	Partial evaluation of fastDot for one 2D shape signature
+	A(n,p) @ B(p,k) @ C(k,d): the multiplication-order decision is baked
+	in once and the intermediate product writes into a preallocated
+	buffer, so iterative callers (CV folds, bootstraps, refinement
+	loops) pay neither the FLOP comparison nor the intermediate
+	allocation per call.
+
+		dot3 = fastDotSpec(n, p, k, d, X.dtype)
+		for ...:
+			theta = dot3(A, B, C)
+
+	The buffer lives inside the returned closure and is never returned,
+	so results of successive calls don't alias each other. Pass 1D
+	vectors reshaped to (k, 1).
+	"""
+	# Same FLOP model as fastDot:
+	# forward (A @ B) @ C = kn(p+d), backward A @ (B @ C) = pd(n+k)
+	forward = k*n*(p+d) <= p*d*(n+k)
+
+	if forward:
+		tmp = empty((n, k), dtype = dtype)
+		def dot3(A, B, C):
+			matmul(A, B, out = tmp)
+			return tmp @ C
+	else:
+		tmp = empty((p, d), dtype = dtype)
+		def dot3(A, B, C):
+			matmul(B, C, out = tmp)
+			return A @ tmp
+	return dot3
 
 	
 
-def _XTX(XT):
+def _XTX(XT, out = None):
 	"""
-	[Added 30/9/2018]
+	[Added 30/9/2018] [Edited 30/8/2026 SYRK fills lower directly]
 	Computes XT @ X much faster than naive XT @ X.
 	Notice XT @ X is symmetric, hence instead of doing the
 	full matrix multiplication XT @ X which takes O(np^2) time,
-	compute only the upper triangular which takes slightly
+	compute only the lower triangular which takes slightly
 	less time and memory.
+
+	Note only the lower triangular part of the output is valid.
+	SYRK is asked for the lower triangle directly (lower = 1), so no
+	trailing .T transpose-view is returned. Callers wanting the full
+	matrix pass the output through reflect(...).
+
+	When n >> p (tall-thin X), SYRK is slower than plain GEMM on
+	OpenBLAS / Accelerate, so dispatch to GEMM past _SYRK_GEMM_RATIO.
+	The GEMM path fills both triangles, so the lower contract still holds.
+
+	Iterative callers can recycle the (p,p) result buffer by passing
+	OUT - it must be Fortran ordered and match XT's dtype, eg
+	empty((p,p), dtype = X.dtype, order = 'F') allocated once. SYRK
+	then writes into it in place instead of allocating per call.
 	"""
-	if XT.dtype == float64:
-		return dsyrk(1, XT, trans = 0).T
-	return ssyrk(1, XT, trans = 0).T
+	p, n = XT.shape
+	if n > _SYRK_GEMM_RATIO * p:
+		if out is not None:
+			return matmul(XT, XT.T, out = out)
+		return XT @ XT.T
+	syrk = dsyrk if XT.dtype == float64 else ssyrk
+	if out is not None:
+		return syrk(1, XT, c = out, beta = 0, overwrite_c = 1, trans = 0, lower = 1)
+	return syrk(1, XT, trans = 0, lower = 1)
 
 
 
-def _XXT(XT):
+def _XXT(XT, out = None):
 	"""
-	[Added 30/9/2018]
+	[Added 30/9/2018] [Edited 30/8/2026 SYRK fills lower directly]
 	Computes X @ XT much faster than naive X @ XT.
 	Notice X @ XT is symmetric, hence instead of doing the
 	full matrix multiplication X @ XT which takes O(pn^2) time,
-	compute only the upper triangular which takes slightly
+	compute only the lower triangular which takes slightly
 	less time and memory.
+
+	Note only the lower triangular part of the output is valid.
+	SYRK is asked for the lower triangle directly (lower = 1), so no
+	trailing .T transpose-view is returned. Callers wanting the full
+	matrix pass the output through reflect(...).
+
+	When p >> n (fat X), SYRK is slower than plain GEMM on
+	OpenBLAS / Accelerate, so dispatch to GEMM past _SYRK_GEMM_RATIO.
+	The GEMM path fills both triangles, so the lower contract still holds.
+
+	Iterative callers can recycle the (n,n) result buffer by passing
+	OUT - it must be Fortran ordered and match XT's dtype, eg
+	empty((n,n), dtype = X.dtype, order = 'F') allocated once. SYRK
+	then writes into it in place instead of allocating per call.
 	"""
-	if XT.dtype == float64:
-		return dsyrk(1, XT, trans = 1).T
-	return ssyrk(1, XT, trans = 1).T
+	p, n = XT.shape
+	if p > _SYRK_GEMM_RATIO * n:
+		if out is not None:
+			return matmul(XT.T, XT, out = out)
+		return XT.T @ XT
+	syrk = dsyrk if XT.dtype == float64 else ssyrk
+	if out is not None:
+		return syrk(1, XT, c = out, beta = 0, overwrite_c = 1, trans = 1, lower = 1)
+	return syrk(1, XT, trans = 1, lower = 1)
 
 
 
 def XXT_sparse(val, colPointer, rowIndices, n, p):
 	"""
 	See _XXT_sparse documentation.
+
+	Each thread owns one dense scratch row R[tid] of size p, allocated
+	once. Row k is scattered into it, every row j > k is multiplied
+	against it branchlessly (a zero slot just contributes zero), then
+	only row k's touched slots are cleared. This removes the per-k
+	P.copy() allocation, the O(p) zeroing and the unpredictable
+	`if v != 0` branch in the hot loop.
+
+	When both rows of a pair are short relative to p, gathering from
+	the p-sized scratch misses cache on nearly every load, so the pair
+	is intersected with a sorted two-pointer walk over the column
+	indices instead (CSR indices are sorted). The branch is decided by
+	a cheap nnz-sum check, predictable per density class.
 	"""
 	D = zeros((n,n), dtype = val.dtype)
-	P = zeros(p, dtype = val.dtype)
+	R = zeros((get_num_threads(), p), dtype = val.dtype)
+	shortPair = p // 16
 
 	for k in prange(n-1):
+		Rt = R[get_thread_id()]
 		l = rowIndices[k]
 		r = rowIndices[k+1]
+		nnzk = r - l
 
-		R = P.copy()
-		b = l
-		for i in range(r-l):
-			x = colPointer[b]
-			R[x] = val[b]
-			b += 1
-		
-		for j in prange(k+1, n):
-			l = rowIndices[j]
-			r = rowIndices[j+1]
+		for b in range(l, r):
+			Rt[colPointer[b]] = val[b]
+
+		for j in range(k+1, n):
+			lj = rowIndices[j]
+			rj = rowIndices[j+1]
 			s = 0
-			c = l
-			for a in range(r-l):
-				z = colPointer[c]
-				v = R[z]
-				if v != 0:
-					s += v*val[c]
-				c += 1
+			if nnzk + (rj - lj) < shortPair:
+				a = l
+				c = lj
+				while a < r and c < rj:
+					ca = colPointer[a]
+					cc = colPointer[c]
+					if ca == cc:
+						s += val[a] * val[c]
+						a += 1
+						c += 1
+					elif ca < cc:
+						a += 1
+					else:
+						c += 1
+			else:
+				for c in range(lj, rj):
+					s += Rt[colPointer[c]] * val[c]
 			D[j, k] = s
+
+		for b in range(l, r):
+			Rt[colPointer[b]] = 0
 	return D
-_XXT_sparse_single = njit(XXT_sparse, fastmath = True, nogil = True, cache = True)
+_XXT_sparse_single = njit(XXT_sparse, fastmath = True, nogil = True)
 _XXT_sparse_parallel = njit(XXT_sparse, fastmath = True, nogil = True, parallel = True)
 
 
+def XXT_sparse_smmp(val, colPointer, rowIndices, n, p):
+	"""
+	See _XXT_sparse documentation.
+
+	SMMP-style two phase kernel for very sparse X. The dense-scratch
+	kernel above still scans every row pair (k,j), which is O(n * nnz)
+	even when almost all row intersections are empty. Here the transpose
+	(column -> rows) index is built once, then row k only ever meets the
+	rows that share at least one column with it, giving O(nnz^2 / p)
+	on average instead.
+	"""
+	nnz = len(val)
+	D = zeros((n,n), dtype = val.dtype)
+
+	# Symbolic phase: counting sort of the nonzeros by column.
+	start = zeros(p + 1, dtype = int64)
+	for b in range(nnz):
+		start[colPointer[b] + 1] += 1
+	for c in range(p):
+		start[c + 1] += start[c]
+
+	rowsOfCol = zeros(nnz, dtype = int64)
+	valsOfCol = zeros(nnz, dtype = val.dtype)
+	fill = start[:p].copy()
+	for k in range(n):
+		for b in range(rowIndices[k], rowIndices[k+1]):
+			c = colPointer[b]
+			pos = fill[c]
+			rowsOfCol[pos] = k
+			valsOfCol[pos] = val[b]
+			fill[c] = pos + 1
+
+	# Numeric phase: scatter-accumulate row k against candidate rows only.
+	nt = get_num_threads()
+	acc = zeros((nt, n), dtype = val.dtype)
+	seen = zeros((nt, n), dtype = bool_)
+	cand = zeros((nt, n), dtype = int64)
+
+	for k in prange(n-1):
+		tid = get_thread_id()
+		acc_t = acc[tid]
+		seen_t = seen[tid]
+		cand_t = cand[tid]
+		found = 0
+
+		for b in range(rowIndices[k], rowIndices[k+1]):
+			c = colPointer[b]
+			v = val[b]
+			for t in range(start[c], start[c+1]):
+				j = rowsOfCol[t]
+				if j > k:
+					acc_t[j] += v * valsOfCol[t]
+					if not seen_t[j]:
+						seen_t[j] = True
+						cand_t[found] = j
+						found += 1
+
+		for i in range(found):
+			j = cand_t[i]
+			D[j, k] = acc_t[j]
+			acc_t[j] = 0
+			seen_t[j] = False
+	return D
+_XXT_sparse_smmp_single = njit(XXT_sparse_smmp, fastmath = True, nogil = True)
+_XXT_sparse_smmp_parallel = njit(XXT_sparse_smmp, fastmath = True, nogil = True, parallel = True)
+
+
 def _XXT_sparse(val, colPointer, rowIndices, n, p, n_jobs = 1):
 	"""
-	[Added 16/10/2018]
+	[Added 16/10/2018] [Edited 30/8/2026 SMMP path for very sparse X]
 	Computes X @ XT very quickly. Approx 50-60% faster than Sklearn's version,
 	as it doesn't optimize a lot. Note, computes only lower triangular X @ XT,
 	and disregards diagonal (set to 0)
+
+	Below _SMMP_MAX_DENSITY the SMMP kernel is used, which only visits
+	row pairs sharing a column; otherwise the dense-scratch kernel.
 	"""
-	XXT = _XXT_sparse_parallel(val, colPointer, rowIndices, n, p) if n_jobs != 1 else \
-		_XXT_sparse_single(val, colPointer, rowIndices, n, p)
+	if len(val) < _SMMP_MAX_DENSITY * n * p:
+		XXT = _XXT_sparse_smmp_parallel(val, colPointer, rowIndices, n, p) if n_jobs != 1 else \
+			_XXT_sparse_smmp_single(val, colPointer, rowIndices, n, p)
+	else:
+		XXT = _XXT_sparse_parallel(val, colPointer, rowIndices, n, p) if n_jobs != 1 else \
+			_XXT_sparse_single(val, colPointer, rowIndices, n, p)
 	return XXT
 
 
 
-@njit(fastmath = True, nogil = True, cache = True)
-def rowSum(X, norm = False):
-	"""
-	[Added 17/10/2018]
-	Computes rowSum**2 for dense matrix efficiently, instead of using einsum
+def rowSum(X, norm = False, precision = None):
 	"""
-	n, p = X.shape
-	S = zeros(n, dtype = X.dtype)
+	[Added 17/10/2018] [Edited 30/8/2026]
+	Computes rowSum**2 for dense matrix efficiently.
 
-	for i in range(n):
-		s = 0
-		Xi = X[i]
-		for j in range(p):
-			Xij = Xi[j]
-			s += Xij*Xij
-		S[i] = s
+	Now uses einsum, whose internal SIMD loop beats the old scalar
+	Numba double loop - the per-row accumulator serialized into scalar
+	FMAs instead of vector ones.
+
+	Like traceXTX, PRECISION = float32 halves the bytes moved for
+	float64 inputs when reduced accuracy is tolerable; float32 inputs
+	already stay float32.
+	"""
+	if precision is not None:
+		X = X.astype(precision, copy = False)
+	S = einsum('ij,ij->i', X, X)
 	if norm:
-		S**=0.5
+		S **= 0.5
 	return S
 
 
-@njit(fastmath = True, nogil = True, cache = True)
-def rowSum_sparse(val, colPointer, rowIndices, norm = False):
+def _rowSum_sparse(val, colPointer, rowIndices, norm = False):
 	"""
-	[Added 17/10/2018]
-	Computes rowSum**2 for sparse matrix efficiently, instead of using einsum
+	See rowSum_sparse documentation.
 	"""
 	n = len(rowIndices)-1
 	S = zeros(n, dtype = val.dtype)
 
-	for i in range(n):
+	for i in prange(n):
 		s = 0
-		l = rowIndices[i]
-		r = rowIndices[i+1]
-		b = l
-		for j in range(r-l):
+		for b in range(rowIndices[i], rowIndices[i+1]):
 			Xij = val[b]
 			s += Xij*Xij
-			b += 1
 		S[i] = s
 	if norm:
 		S**=0.5
 	return S
+rowSum_sparse_single = njit(_rowSum_sparse, fastmath = True, nogil = True, cache = True)
+rowSum_sparse_parallel = njit(_rowSum_sparse, fastmath = True, nogil = True, parallel = True)
+
+
+def rowSum_sparse(val, colPointer, rowIndices, norm = False, n_jobs = 1):
+	"""
+	[Added 17/10/2018] [Edited 30/8/2026 parallel variant]
+	Computes rowSum**2 for sparse matrix efficiently, instead of using einsum.
+	The CSR row scan is embarrassingly parallel - each prange thread
+	accumulates its own contiguous block of rows, so bandwidth scales
+	with core count.
+	"""
+	S = rowSum_sparse_parallel(val, colPointer, rowIndices, norm) if n_jobs != 1 else \
+		rowSum_sparse_single(val, colPointer, rowIndices, norm)
+	return S
+
 
 
+# Tile edge for the blocked reflect kernel. A 64x64 float64 tile is
+# 32KB, so source and destination tiles together fit in L1/L2.
+_REFLECT_BLOCK = 64
 
 def _reflect(X):
 	"""
 	See reflect(X, n_jobs = N) documentation.
 	"""
 	n = len(X)
-	for i in prange(1, n):
-		Xi = X[i]
-		for j in range(i):
-			X[j, i] = Xi[j]
+	B = _REFLECT_BLOCK
+	nBlocks = (n + B - 1) // B
+
+	for bi in prange(nBlocks):
+		ii = bi * B
+		iEnd = min(ii + B, n)
+
+		# Off diagonal tiles: mirror X[ii:iEnd, jj:jj+B] to its transpose.
+		for jj in range(0, ii, B):
+			for i in range(ii, iEnd):
+				for j in range(jj, jj + B):
+					X[j, i] = X[i, j]
+
+		# Diagonal tile: only below the diagonal.
+		for i in range(ii, iEnd):
+			for j in range(ii, i):
+				X[j, i] = X[i, j]
 	return X
 reflect_single = njit(_reflect, fastmath = True, nogil = True, cache = True)
 reflect_parallel = njit(_reflect, fastmath = True, nogil = True, parallel = True)
@@ -340,18 +716,17 @@ reflect_parallel = njit(_reflect, fastmath = True, nogil = True, parallel = True
 
 def reflect(X, n_jobs = 1):
 	"""
-	[Added 15/10/2018] [Edited 18/10/2018]
+	[Added 15/10/2018] [Edited 18/10/2018] [Edited 30/8/2026 cache blocked]
 	Reflects lower triangular of matrix efficiently to upper.
 	Notice much faster than say X += X.T or naive:
 		for i in range(n):
 			for j in range(i, n):
 				X[i,j] = X[j,i]
-	In fact, it is much faster to perform vertically:
-		for i in range(1, n):
-			Xi = X[i]
-			for j in range(i):
-				X[j,i] = Xi[j]
-	The trick is to notice X[i], which reduces array access.
+	The copy is tiled into _REFLECT_BLOCK sized squares: the upper-tri
+	stores still have stride p, but within one tile every touched cache
+	line stays resident and ends up fully written, instead of one 8 byte
+	write per line as in the untiled loop. Tiles parallelize over rows
+	of blocks when n_jobs != 1.
 	"""
 	X = reflect_parallel(X) if n_jobs != 1 else reflect_single(X)
 	return X